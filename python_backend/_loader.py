@@ -0,0 +1,223 @@
+#============================================================
+#  SHARED CSV LOADER
+#  Parses an indicator CSV once and caches the preprocessed frame
+#  so computing several indicators on one file skips re-parsing
+#============================================================
+import hashlib
+import os
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import IO, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Prefer the multithreaded PyArrow CSV reader when it is installed
+# (it also enables the feather copies of the default files)
+try:
+    import pyarrow.ipc as pa_ipc
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    pa_ipc = None
+    CSV_ENGINE = 'c'
+
+# Columnar copies of CSV files written by write_feather_cache
+FEATHER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+# Union of the columns used by the adequacy, equity, cropping intensity
+# and irrigation utilization calculations
+CSV_COLS = ['year', 'Season', 'Crop Type', 'CropID', 'Area', 'ETa', 'ETa90', 'status']
+
+# A CSV file path, or an in-memory upload (parsed without caching)
+CsvSource = Union[str, IO[bytes]]
+
+# Compact dtypes applied while parsing (year/Season are narrowed in _preprocess,
+# once blank cells are handled, since a parse-time int cast fails on them)
+CSV_DTYPES = {'Crop Type': 'category', 'status': 'category'}
+
+
+def _preprocess(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalize year/status/CropID to categoricals and Season to a nullable int
+    Rows without a year are dropped (row order is otherwise kept as in the file)
+    """
+    if 'year' in df.columns:
+        # Rows with a blank year belong to no year of any indicator table
+        if df['year'].isna().any():
+            df = df[df['year'].notna()].reset_index(drop=True)
+        # Ordered once here so every year index downstream comes from the codes
+        year = df['year'].to_numpy(dtype=np.int32)
+        df['year'] = pd.Categorical(year, categories=np.unique(year), ordered=True)
+    if 'Season' in df.columns:
+        df['Season'] = df['Season'].astype('Int8')
+    if 'status' in df.columns:
+        # Cased as in the file; _prepare derives both irrigated masks from the codes
+        df['status'] = df['status'].astype('category')
+    if 'CropID' in df.columns:
+        # Cast after parsing so the categories stay numeric
+        df['CropID'] = df['CropID'].astype('category')
+    return df
+
+
+def _feather_path(csv_path: str) -> str:
+    """Location of the feather copy of a CSV (keyed on its absolute path)"""
+    digest = hashlib.sha1(os.path.abspath(csv_path).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(FEATHER_DIR, f"{os.path.basename(csv_path)}.{digest}.feather")
+
+
+def _fresh_feather(source: CsvSource) -> Optional[str]:
+    """Feather copy of a CSV path if one exists and is not older than the CSV"""
+    if pa_ipc is None or not isinstance(source, str):
+        return None
+    path = _feather_path(source)
+    try:
+        if os.path.getmtime(path) >= os.path.getmtime(source):
+            return path
+    except OSError:
+        pass
+    return None
+
+
+def write_feather_cache(csv_path: str) -> None:
+    """Write a feather copy of a CSV so cold loads skip CSV parsing (no-op without pyarrow or while fresh)"""
+    if pa_ipc is None or _fresh_feather(csv_path):
+        return
+    os.makedirs(FEATHER_DIR, exist_ok=True)
+    path = _feather_path(csv_path)
+    # Write then rename, so concurrent workers never read a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        pd.read_csv(csv_path, engine=CSV_ENGINE).to_feather(tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+    finally:
+        # Leave no partial file behind when the parse or write fails
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_table(source: CsvSource, columns: Optional[List[str]] = None,
+               dtype: Optional[dict] = None) -> pd.DataFrame:
+    """Raw columns of a CSV path or buffer, from its feather copy when that is fresh"""
+    feather = _fresh_feather(source)
+    if feather:
+        df = pd.read_feather(feather, columns=columns)
+        return df.astype(dtype) if dtype else df
+    return pd.read_csv(source, usecols=columns, dtype=dtype, engine=CSV_ENGINE)
+
+
+def read_header(source: CsvSource) -> List[str]:
+    """Column names of a CSV path or buffer (buffers are rewound for the full read)"""
+    feather = _fresh_feather(source)
+    if feather:
+        return pa_ipc.open_file(feather).schema.names
+    header = pd.read_csv(source, nrows=0).columns.tolist()
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return header
+
+
+def _read_csv(source: CsvSource) -> pd.DataFrame:
+    """Parse and preprocess the indicator columns of a CSV path or buffer"""
+    feather = _fresh_feather(source)
+    
+    # The pyarrow engine only accepts a list for usecols, so match against the header
+    header = read_header(source)
+    usecols = [c for c in CSV_COLS if c in header]
+    dtypes = {c: t for c, t in CSV_DTYPES.items() if c in usecols}
+    
+    if feather:
+        df = pd.read_feather(feather, columns=usecols).astype(dtypes)
+    else:
+        df = pd.read_csv(source, usecols=usecols, dtype=dtypes, engine=CSV_ENGINE)
+    return _preprocess(df)
+
+
+@lru_cache(maxsize=4)
+def load_csv(csv_path: str, mtime: float) -> pd.DataFrame:
+    """
+    Load and preprocess a CSV file, cached on (path, mtime)
+    The returned frame is shared between callers and must not be modified
+    """
+    return _read_csv(csv_path)
+
+
+def require_columns(columns: Iterable[str], required_cols: Iterable[str]) -> None:
+    """Raise ValueError for the first required column that is missing"""
+    columns = set(columns)
+    for col in required_cols:
+        if col not in columns:
+            raise ValueError(f"Missing required column: {col}")
+
+
+def _prepare(df: pd.DataFrame) -> SimpleNamespace:
+    """
+    Typed NumPy arrays of the indicator columns, one entry per row
+    Columns absent from the CSV are None; codes are indexes into years/crop_types
+    """
+    def values(col, dtype):
+        # C-contiguous buffers so the reductions stream through memory
+        return np.ascontiguousarray(df[col].to_numpy(dtype=dtype)) if col in df.columns else None
+    
+    irrigated = irrigated_exact = None
+    if 'status' in df.columns:
+        # Flag each status category once, then spread over the rows by code (-1 = blank)
+        categories = df['status'].cat.categories
+        codes = df['status'].cat.codes.to_numpy()
+        irrigated = np.append(categories.astype(str).str.upper() == 'IRRIGATED', False)[codes]
+        irrigated_exact = np.append(categories == 'IRRIGATED', False)[codes]
+    
+    return SimpleNamespace(
+        columns=list(df.columns),
+        years=([int(y) for y in df['year'].cat.categories] if 'year' in df.columns else []),
+        year_code=(df['year'].cat.codes.to_numpy(dtype=np.int32) if 'year' in df.columns else None),
+        # Blank seasons become -1, which matches no season
+        season=(np.ascontiguousarray(df['Season'].to_numpy(dtype=np.int8, na_value=-1))
+                if 'Season' in df.columns else None),
+        crop_types=(df['Crop Type'].cat.categories.tolist() if 'Crop Type' in df.columns else []),
+        crop_code=(df['Crop Type'].cat.codes.to_numpy(dtype=np.int32) if 'Crop Type' in df.columns else None),
+        # Built on first use by crop_id_values() (only equity and cropping intensity read it)
+        crop_id_column=(df['CropID'] if 'CropID' in df.columns else None),
+        crop_id=None,
+        # Case-insensitive status match (equity, irrigation utilization) and the
+        # exact "IRRIGATED" match used by adequacy
+        irrigated=irrigated,
+        irrigated_exact=irrigated_exact,
+        area=values('Area', np.float64),
+        eta=values('ETa', np.float64),
+        eta90=values('ETa90', np.float64),
+    )
+
+
+def crop_id_values(data: SimpleNamespace) -> Optional[np.ndarray]:
+    """
+    CropID of every row as int64, None without a CropID column (built once per data)
+    Blank, non-numeric and non-integer IDs become -1, which matches no crop
+    """
+    if data.crop_id is None and data.crop_id_column is not None:
+        # Convert each category once, then spread over the rows by code (-1 = blank)
+        column = data.crop_id_column
+        ids = pd.to_numeric(pd.Series(column.cat.categories), errors='coerce').to_numpy(dtype=np.float64)
+        usable = np.isfinite(ids) & (ids == np.round(ids)) & (np.abs(ids) < 2 ** 62)
+        ids = np.where(usable, ids, -1).astype(np.int64)
+        data.crop_id = np.append(ids, -1)[column.cat.codes.to_numpy()]
+    return data.crop_id
+
+
+@lru_cache(maxsize=4)
+def load_arrays(csv_path: str, mtime: float) -> SimpleNamespace:
+    """Cached typed-array view of load_csv(csv_path, mtime)"""
+    return _prepare(load_csv(csv_path, mtime))
+
+
+def load_indicator_csv(source: CsvSource) -> pd.DataFrame:
+    """Load a CSV through the cache, keyed on its current modification time (buffers are parsed directly)"""
+    if not isinstance(source, str):
+        return _read_csv(source)
+    return load_csv(source, os.path.getmtime(source))
+
+
+def load_indicator_arrays(source: CsvSource) -> SimpleNamespace:
+    """Load a CSV as typed arrays through the cache (buffers are parsed directly)"""
+    if not isinstance(source, str):
+        return _prepare(_read_csv(source))
+    return load_arrays(source, os.path.getmtime(source))
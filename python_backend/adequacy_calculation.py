@@ -5,8 +5,17 @@
 #============================================================
 import pandas as pd
 import numpy as np
+from types import SimpleNamespace
 from typing import Dict, Optional
 
+from _loader import CsvSource, load_indicator_arrays, require_columns
+
+# numba is optional; without it the per-cell sums use np.bincount
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 # Season labels mapping
 SEASON_LABELS = {
     1: 'Kharif (1)',
@@ -15,112 +24,174 @@ SEASON_LABELS = {
     0: 'Annual (0)',
 }
 
+# Season keys used in the JSON summary
+SEASON_KEYS = {
+    1: 'kharif',
+    2: 'rabi',
+    3: 'zaid',
+    0: 'annual',
+}
+
 # Crop types to exclude (auto applied to all seasons)
 EXCLUDE_CROPS = ['Other Unirrigated']
 
 # Seasons to compute
 SEASONS = [0, 1, 2, 3]
 
+# Columns required in the CSV
+REQUIRED_COLS = ['year', 'Season', 'Crop Type', 'Area', 'ETa', 'ETa90', 'status']
+
+
+if njit is not None:
+    # nogil lets the other request threads of a worker run during the pass
+    @njit(cache=True, nogil=True)
+    def _cell_sums(year_code, crop_code, area, eta, eta90, n_years, n_crops):
+        area_sum = np.zeros((n_years, n_crops), np.float64)
+        row_n = np.zeros((n_years, n_crops), np.float64)
+        eta_sum = np.zeros((n_years, n_crops), np.float64)
+        eta_n = np.zeros((n_years, n_crops), np.float64)
+        eta90_sum = np.zeros((n_years, n_crops), np.float64)
+        eta90_n = np.zeros((n_years, n_crops), np.float64)
+        for i in range(eta.size):
+            y, c = year_code[i], crop_code[i]
+            row_n[y, c] += 1
+            if not np.isnan(area[i]):
+                area_sum[y, c] += area[i]
+            if not np.isnan(eta[i]):
+                eta_sum[y, c] += eta[i]
+                eta_n[y, c] += 1
+            if not np.isnan(eta90[i]):
+                eta90_sum[y, c] += eta90[i]
+                eta90_n[y, c] += 1
+        return area_sum, row_n, eta_sum, eta_n, eta90_sum, eta90_n
+
+
+def warm_up() -> None:
+    """Compile the numba cell kernel ahead of the first request (no-op without numba)"""
+    if njit is not None:
+        code = np.zeros(1, np.int32)
+        one = np.ones(1, np.float64)
+        _cell_sums(code, code, one, one, one, 1, 1)
 
-def process_season_data(df: pd.DataFrame, season: int) -> Optional[Dict]:
-    """Process a single season's data following original Python logic"""
-    # Filter data for selected season (exclude specified crops)
-    df_season = df[(df['Season'] == season) & (~df['Crop Type'].isin(EXCLUDE_CROPS))]
+
+def cell_stats(year_code: np.ndarray, crop_code: np.ndarray, area: np.ndarray, eta: np.ndarray,
+               eta90: np.ndarray, n_years: int, n_crops: int):
+    """
+    Area sum, row count and average ETa/ETa90 per (year, crop) cell in one pass
+    Missing values are skipped; returns dense n_years x n_crops arrays
+    """
+    if njit is not None:
+        area_sum, row_n, eta_sum, eta_n, eta90_sum, eta90_n = _cell_sums(
+            year_code, crop_code, area, eta, eta90, n_years, n_crops)
+    else:
+        cell = year_code * n_crops + crop_code
+        size = n_years * n_crops
+        
+        def sums(values):
+            valid = ~np.isnan(values)
+            return (np.bincount(cell[valid], weights=values[valid], minlength=size).reshape(n_years, n_crops),
+                    np.bincount(cell[valid], minlength=size).reshape(n_years, n_crops))
+        
+        row_n = np.bincount(cell, minlength=size).reshape(n_years, n_crops)
+        (area_sum, _), (eta_sum, eta_n), (eta90_sum, eta90_n) = sums(area), sums(eta), sums(eta90)
     
-    if df_season.empty:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return area_sum, row_n, eta_sum / eta_n, eta90_sum / eta90_n
+
+
+def split_seasons(data: SimpleNamespace) -> Dict[int, np.ndarray]:
+    """
+    Row indices of each season after the crop exclusions, split in one pass
+    Indices stay in file order within a season
+    """
+    excluded = np.isin(data.crop_code, [data.crop_types.index(c) for c in EXCLUDE_CROPS if c in data.crop_types])
+    kept = np.flatnonzero(~excluded)
+    
+    # Stable sort keeps file order inside each season block
+    order = kept[np.argsort(data.season[kept], kind='stable')]
+    seasons, starts = np.unique(data.season[order], return_index=True)
+    return {int(s): rows for s, rows in zip(seasons, np.split(order, starts[1:]))}
+
+
+def process_season_data(data: SimpleNamespace, season: int, season_rows: np.ndarray) -> Optional[Dict]:
+    """
+    Process a single season's data following original Python logic
+    data holds the typed CSV arrays (see _loader.load_arrays); season_rows
+    are that season's row indices from split_seasons
+    """
+    if season_rows.size == 0:
         print(f"⚠ No data found for Season {season}. Skipping.")
         return None
     
-    # Extract dynamic crop list
-    crop_types = df_season['Crop Type'].unique().tolist()
+    # Extract dynamic crop list (order of first appearance)
+    season_codes = pd.unique(data.crop_code[season_rows])
+    crop_types = [data.crop_types[c] if c >= 0 else np.nan for c in season_codes]
     
     # ============================================================
-    # STEP 1 — AREA CALCULATION (Equivalent to Excel SUMIFS)
+    # STEP 1 — AREA + AVERAGE ETa/ETa90 PER (YEAR, CROP) CELL
+    # One fused pass over irrigated rows (Excel SUMIFS/AVERAGEIFS)
     # ============================================================
-    area_df = (df_season[df_season['status'] == "IRRIGATED"]
-               .groupby(['year', 'Crop Type'])['Area']
-               .sum()
-               .unstack(fill_value=0))
+    rows = season_rows[data.irrigated_exact[season_rows] & (data.crop_code[season_rows] >= 0)]
+    area_sum, row_n, avg_eta, avg_eta90 = cell_stats(
+        data.year_code[rows], data.crop_code[rows], data.area[rows], data.eta[rows],
+        data.eta90[rows], len(data.years), len(data.crop_types))
     
-    # Keep seasonal crop types only (no hardcoding)
-    area_df = area_df[[c for c in crop_types if c in area_df.columns]]
+    # Years and seasonal crop types with irrigated rows (no hardcoding)
+    present = row_n > 0
+    year_idx = np.flatnonzero(present.any(axis=1))
+    crop_idx = [c for c in season_codes if c >= 0 and present[:, c].any()]
     
     # Round and finalize
-    area_df = area_df.round(0).astype(int)
+    area = area_sum[np.ix_(year_idx, crop_idx)].round(0).astype(int)
+    area_df = pd.DataFrame(area, index=[data.years[y] for y in year_idx],
+                           columns=[data.crop_types[c] for c in crop_idx])
     
     # ============================================================
     # STEP 2 — ADEQUACY MATRIX (Cell-wise)
-    # Formula → 1 - avg(ETa)/avg(ETa90)
+    # Formula → 1 - avg(ETa)/avg(ETa90), blank when no area
     # ============================================================
-    def compute_adequacy(year, crop):
-        if area_df.loc[year, crop] <= 0:
-            return None  # blank when no area
-        
-        subset = df_season[(df_season['year'] == year) &
-                           (df_season['Crop Type'] == crop) &
-                           (df_season['status'] == "IRRIGATED")]
-        
-        if subset.empty:
-            return None
-        
-        avg_eta = subset['ETa'].mean()
-        avg_eta90 = subset['ETa90'].mean()
-        
-        if avg_eta90 == 0 or pd.isna(avg_eta90):
-            return None
-        
-        return round(1 - (avg_eta / avg_eta90), 2)
-    
-    adequacy_df = pd.DataFrame(index=area_df.index, columns=area_df.columns)
+    eta = avg_eta[np.ix_(year_idx, crop_idx)]
+    eta90 = avg_eta90[np.ix_(year_idx, crop_idx)]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        adequacy = np.where((area > 0) & (eta90 > 0), 1 - eta / eta90, np.nan).round(2)
     
-    for yr in adequacy_df.index:
-        for crop in adequacy_df.columns:
-            adequacy_df.loc[yr, crop] = compute_adequacy(yr, crop)
+    adequacy_df = pd.DataFrame(adequacy, index=area_df.index, columns=area_df.columns)
     
     # ============================================================
     # STEP 3 — COMBINED ADEQUACY PER YEAR (Weighted Mean)
     # SUMPRODUCT(row_adequacy * row_area) / SUM(area)
     # ============================================================
-    combined = {}
+    mask = adequacy_df.notna().to_numpy()
+    weights = area_df.to_numpy() * mask
+    num = (adequacy_df.fillna(0).to_numpy() * weights).sum(axis=1)
+    den = weights.sum(axis=1)
     
-    for yr in area_df.index:
-        # Convert None → NaN safely
-        valid = adequacy_df.loc[yr].replace("", np.nan)
-        valid = pd.to_numeric(valid, errors='coerce')
-        valid = valid[valid.notna()]  # keep only numeric adequacy entries
-        
-        if valid.empty:
-            combined[yr] = None
-            continue
-        
-        weights = area_df.loc[yr][valid.index]
-        score = (valid * weights).sum() / weights.sum()
-        
-        combined[yr] = round(score, 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        combined_arr = np.where(den > 0, (num / den).round(2), np.nan)
     
-    # Convert to dictionaries for JSON serialization
-    area_matrix = area_df.to_dict('index')
-    adequacy_matrix = adequacy_df.to_dict('index')
+    combined = {yr: (None if np.isnan(val) else val)
+                for yr, val in zip(area_df.index.tolist(), combined_arr.tolist())}
     
+    # Matrices as shared index/columns plus row-major values (split layout);
+    # left as NumPy arrays for the server's JSON encoder (NaN → null)
     return {
-        'area_matrix': {int(k): v for k, v in area_matrix.items()},
-        'adequacy_matrix': {int(k): v for k, v in adequacy_matrix.items()},
+        'columns': area_df.columns.tolist(),
+        'index': [int(y) for y in area_df.index],
+        'area_values': np.ascontiguousarray(area_df.to_numpy()),
+        'adeq_values': np.ascontiguousarray(adequacy_df.to_numpy()),
         'combined_adequacy': {int(k): v for k, v in combined.items()},
         'crop_types': crop_types,
         'years': list(area_df.index)
     }
 
 
-def compute_adequacy_from_csv(csv_path: str) -> Dict:
+def compute_adequacy_from_csv(source: CsvSource) -> Dict:
     """Compute adequacy summary for all seasons following original Python logic"""
-    # Load CSV data
-    df = pd.read_csv(csv_path)
+    # Load CSV data (cached typed arrays, shared with the other indicators)
+    data = load_indicator_arrays(source)
     
     # Ensure required columns exist
-    required_cols = ['year', 'Season', 'Crop Type', 'Area', 'ETa', 'ETa90', 'status']
-    for col in required_cols:
-        if col not in df.columns:
-            raise ValueError(f"Missing required column: {col}")
+    require_columns(data.columns, REQUIRED_COLS)
     
     # Containers for results
     combined_dfs = {}
@@ -128,9 +199,13 @@ def compute_adequacy_from_csv(csv_path: str) -> Dict:
     
     # ============================================================
     # PROCESS EACH SEASON INDIVIDUALLY
+    # Rows are split by season once and each season gets its own slice
     # ============================================================
+    season_rows = split_seasons(data)
+    no_rows = np.empty(0, dtype=np.intp)
+    
     for season in SEASONS:
-        result = process_season_data(df, season)
+        result = process_season_data(data, season, season_rows.get(season, no_rows))
         if result:
             season_results[season] = result
             # Create combined adequacy dataframe for this season
@@ -155,38 +230,15 @@ def compute_adequacy_from_csv(csv_path: str) -> Dict:
     # Add AVERAGE row calculation
     avg_row = summary_df.mean().round(2)
     
-    # Convert to list of dicts for summary
-    summary = []
-    for year in summary_df.index:
-        row_data = {
-            'year': int(year),
-            'kharif': None,
-            'rabi': None,
-            'zaid': None,
-            'annual': None,
-        }
-        
-        if 'Kharif (1)' in summary_df.columns:
-            val = summary_df.loc[year, 'Kharif (1)']
-            row_data['kharif'] = float(val) if pd.notna(val) else None
-        if 'Rabi   (2)' in summary_df.columns:
-            val = summary_df.loc[year, 'Rabi   (2)']
-            row_data['rabi'] = float(val) if pd.notna(val) else None
-        if 'Zaid   (3)' in summary_df.columns:
-            val = summary_df.loc[year, 'Zaid   (3)']
-            row_data['zaid'] = float(val) if pd.notna(val) else None
-        if 'Annual (0)' in summary_df.columns:
-            val = summary_df.loc[year, 'Annual (0)']
-            row_data['annual'] = float(val) if pd.notna(val) else None
-        
-        summary.append(row_data)
+    # Convert to list of dicts for summary (missing seasons → None)
+    summary_keys = {label: SEASON_KEYS[s] for s, label in SEASON_LABELS.items()}
+    summary_vals = summary_df.reindex(columns=list(summary_keys)).rename(columns=summary_keys)
+    summary_vals = summary_vals.astype(object).where(summary_vals.notna(), None)
+    summary = [{'year': int(year), **row} for year, row in summary_vals.to_dict('index').items()]
     
-    average = {
-        'kharif': round(float(avg_row.get('Kharif (1)', 0)), 2) if 'Kharif (1)' in avg_row and pd.notna(avg_row.get('Kharif (1)')) else 0,
-        'rabi': round(float(avg_row.get('Rabi   (2)', 0)), 2) if 'Rabi   (2)' in avg_row and pd.notna(avg_row.get('Rabi   (2)')) else 0,
-        'zaid': round(float(avg_row.get('Zaid   (3)', 0)), 2) if 'Zaid   (3)' in avg_row and pd.notna(avg_row.get('Zaid   (3)')) else 0,
-        'annual': round(float(avg_row.get('Annual (0)', 0)), 2) if 'Annual (0)' in avg_row and pd.notna(avg_row.get('Annual (0)')) else 0,
-    }
+    # Seasons that are missing or have no values average to 0
+    avg_vals = avg_row.reindex(list(summary_keys)).fillna(0).rename(summary_keys)
+    average = {key: float(val) for key, val in avg_vals.items()}
     
     return {
         'summary': summary,
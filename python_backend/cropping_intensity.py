@@ -8,6 +8,14 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List
 
+from _loader import CsvSource, crop_id_values, load_indicator_arrays, require_columns
+
+# numba is optional; without it the per-(year, CropID) sums use np.bincount
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 # Crop ID mapping based on Excel structure
 CROP_ID_MAPPING = {
     1: 'Double Crop Kharif/Rabi',
@@ -20,7 +28,52 @@ CROP_ID_MAPPING = {
     8: 'Zaid Crop'
 }
 
-def compute_cropping_intensity_from_csv(csv_path: str, cca: float) -> Dict:
+# Columns required in the CSV
+REQUIRED_COLS = ['year', 'Area']
+
+# Number of CropID buckets (index 0 collects IDs outside 1-8)
+N_CROP_BUCKETS = 9
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _bucket_sum(year_codes, crop, area, n_years):
+        out = np.zeros((n_years, N_CROP_BUCKETS), np.float64)
+        for i in range(area.size):
+            if np.isnan(area[i]):
+                continue
+            c = crop[i] if 1 <= crop[i] < N_CROP_BUCKETS else 0
+            out[year_codes[i], c] += area[i]
+        return out
+
+
+def warm_up() -> None:
+    """Compile the numba bucket kernel ahead of the first request (no-op without numba)"""
+    if njit is not None:
+        # The loader's Area buffer is read-only when it wraps pyarrow memory, which
+        # numba types separately, so compile both variants
+        area = np.ones(1, np.float64)
+        _bucket_sum(np.zeros(1, np.int32), np.ones(1, np.int64), area, 1)
+        area.flags.writeable = False
+        _bucket_sum(np.zeros(1, np.int32), np.ones(1, np.int64), area, 1)
+
+
+def area_by_year_crop(year_code: np.ndarray, crop_id: np.ndarray, area: np.ndarray, n_years: int) -> np.ndarray:
+    """
+    Sum Area per (year, CropID bucket)
+    Returns an n_years x N_CROP_BUCKETS array; column 0 holds IDs outside 1-8
+    """
+    if njit is not None:
+        return _bucket_sum(year_code, crop_id, area, n_years)
+    
+    bucket = np.where((crop_id >= 1) & (crop_id < N_CROP_BUCKETS), crop_id, 0)
+    weights = np.where(np.isnan(area), 0, area)
+    sums = np.bincount(year_code * N_CROP_BUCKETS + bucket, weights=weights,
+                       minlength=n_years * N_CROP_BUCKETS)
+    return sums.reshape(n_years, N_CROP_BUCKETS)
+
+
+def compute_cropping_intensity_from_csv(source: CsvSource, cca: float) -> Dict:
     """
     Compute cropping intensity from CSV file
     Returns three tables:
@@ -28,84 +81,64 @@ def compute_cropping_intensity_from_csv(csv_path: str, cca: float) -> Dict:
     2. Cropped Area (normalized by CCA)
     3. Based on CCA (Cropping Intensity and Total Cropped Area)
     """
-    # Load CSV data
-    df = pd.read_csv(csv_path)
+    # Load CSV data (cached typed arrays, shared with the other indicators)
+    data = load_indicator_arrays(source)
     
     # Ensure required columns exist
-    required_cols = ['year', 'Area']
-    for col in required_cols:
-        if col not in df.columns:
-            raise ValueError(f"Missing required column: {col}")
+    require_columns(data.columns, REQUIRED_COLS)
     
     # Check if CropID column exists
-    if 'CropID' not in df.columns:
+    row_crop_id = crop_id_values(data)
+    if row_crop_id is None:
         raise ValueError("CropID column is required for cropping intensity calculation")
     
     # Get unique years
-    years = sorted(df['year'].unique())
+    years = data.years
     
     # Initialize crop IDs (1-8)
     crop_ids = list(range(1, 9))
+    crop_cols = {crop_id: f'crop_{crop_id}' for crop_id in crop_ids}
+    
+    # Area per (year, CropID) and per year in one pass
+    sums = area_by_year_crop(data.year_code, row_crop_id, data.area, len(years))
+    pivot = pd.DataFrame(sums[:, crop_ids], index=years, columns=crop_ids)
+    totals = pd.Series(sums.sum(axis=1), index=years)
+    
+    def table_records(table: pd.DataFrame) -> List[Dict]:
+        records = table.rename(columns=crop_cols).rename_axis('year').reset_index().to_dict('records')
+        for row in records:
+            row['year'] = int(row['year'])
+        return records
     
     # Table 1: Cropped Area by ID (actual areas)
-    cropped_area_data = []
-    for year in years:
-        year_data = df[df['year'] == year]
-        row = {'year': int(year)}
-        
-        for crop_id in crop_ids:
-            crop_data = year_data[year_data['CropID'] == crop_id]
-            area = crop_data['Area'].sum() if not crop_data.empty else 0
-            row[f'crop_{crop_id}'] = round(area, 0)
-        
-        cropped_area_data.append(row)
+    cropped_area = pivot.round(0)
+    cropped_area_data = table_records(cropped_area)
     
     # Calculate averages for Table 1
-    avg_row = {'year': 'AVERAGE'}
-    for crop_id in crop_ids:
-        values = [row[f'crop_{crop_id}'] for row in cropped_area_data]
-        avg_row[f'crop_{crop_id}'] = round(sum(values) / len(values), 0) if values else 0
+    # (0 for every crop when there are no years, as for the other averages)
+    avg_row = {'year': 'AVERAGE', **cropped_area.mean().round(0).fillna(0).rename(crop_cols).to_dict()}
     
     # Table 2: Cropped Area (normalized by CCA)
-    normalized_area_data = []
-    for year in years:
-        year_data = df[df['year'] == year]
-        row = {'year': int(year)}
-        
-        for crop_id in crop_ids:
-            crop_data = year_data[year_data['CropID'] == crop_id]
-            area = crop_data['Area'].sum() if not crop_data.empty else 0
-            normalized = round(area / cca, 3) if cca > 0 else 0
-            row[f'crop_{crop_id}'] = normalized
-        
-        normalized_area_data.append(row)
+    normalized = (pivot / cca).round(3) if cca > 0 else pivot * 0
+    normalized_area_data = table_records(normalized)
     
     # Calculate averages for Table 2
-    avg_normalized = {'year': 'AVERAGE'}
-    for crop_id in crop_ids:
-        values = [row[f'crop_{crop_id}'] for row in normalized_area_data]
-        avg_normalized[f'crop_{crop_id}'] = round(sum(values) / len(values), 3) if values else 0
+    avg_normalized = {'year': 'AVERAGE', **normalized.mean().round(3).fillna(0).rename(crop_cols).to_dict()}
     
     # Table 3: Based on CCA (Cropping Intensity and Total Cropped Area)
-    intensity_data = []
-    for year in years:
-        year_data = df[df['year'] == year]
-        total_cropped_area = year_data['Area'].sum()
-        cropping_intensity = round(total_cropped_area / cca, 2) if cca > 0 else 0
-        
-        intensity_data.append({
-            'year': int(year),
-            'cropping_intensity': cropping_intensity,
-            'total_cropped_area': round(total_cropped_area, 0)
-        })
+    intensity = pd.DataFrame({
+        'cropping_intensity': (totals / cca).round(2) if cca > 0 else totals * 0,
+        'total_cropped_area': totals.round(0),
+    })
+    intensity_data = intensity.rename_axis('year').reset_index().to_dict('records')
+    for row in intensity_data:
+        row['year'] = int(row['year'])
     
     # Calculate averages for Table 3
-    total_areas = [row['total_cropped_area'] for row in intensity_data]
-    intensities = [row['cropping_intensity'] for row in intensity_data]
     avg_intensity = {
         'year': 'AVERAGE',
-        'cropping_intensity': round(sum(intensities) / len(intensities), 2) if intensities else 0,
-        'total_cropped_area': round(sum(total_areas) / len(total_areas), 0) if total_areas else 0
+        'cropping_intensity': round(intensity['cropping_intensity'].mean(), 2) if years else 0,
+        'total_cropped_area': round(intensity['total_cropped_area'].mean(), 0) if years else 0
     }
     
     return {
@@ -7,6 +7,20 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Optional
 
+from _loader import CsvSource, crop_id_values, load_indicator_arrays, require_columns
+
+# numpy_groupies is optional; without it the ETa statistics use np.bincount
+try:
+    import numpy_groupies as npg
+except ImportError:
+    npg = None
+
+# numexpr is optional; it evaluates the row mask in one threaded pass
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
 # Season labels mapping
 SEASON_LABELS = {
     1: 'Kharif (1)',
@@ -18,73 +32,89 @@ SEASON_LABELS = {
 # Seasons to compute
 SEASONS = [0, 1, 2, 3]
 
+# Season keys used in the JSON summary
+SEASON_KEYS = {0: 'annual', 1: 'kharif', 2: 'rabi', 3: 'zaid'}
+
+# Columns required in the CSV (CropID is optional)
+REQUIRED_COLS = ['year', 'Season', 'status', 'ETa']
+
 
-def compute_equity_from_csv(csv_path: str, crop_id: Optional[int] = None) -> Dict:
+def eta_cv_table(year_code: np.ndarray, season: np.ndarray, eta: np.ndarray, n_years: int) -> np.ndarray:
+    """
+    Coefficient of variation of ETa for every (year, season)
+    Returns an n_years x len(SEASONS) array, NaN where equity is undefined
+    """
+    # Composite (year, season) code → flat group index over a dense years x SEASONS grid
+    season_pos = pd.Index(SEASONS).get_indexer(season)
+    in_season = season_pos >= 0
+    group_idx = year_code[in_season] * len(SEASONS) + season_pos[in_season]
+    eta = eta[in_season]
+    size = n_years * len(SEASONS)
+    
+    # Mean/SD skip missing ETa (as pandas does); the row count includes them
+    valid = ~np.isnan(eta)
+    g, x = group_idx[valid], eta[valid]
+    n = np.bincount(group_idx, minlength=size)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # numpy_groupies rejects an empty group_idx (no irrigated rows in these seasons)
+        if npg is not None and g.size > 0:
+            mean = npg.aggregate(g, x, func='mean', size=size, fill_value=np.nan)
+            std = npg.aggregate(g, x, func='std', ddof=1, size=size, fill_value=np.nan)
+        else:
+            k = np.bincount(g, minlength=size)
+            mean = np.bincount(g, weights=x, minlength=size) / k
+            sq_dev = np.bincount(g, weights=(x - mean[g]) ** 2, minlength=size)
+            std = np.where(k > 1, np.sqrt(sq_dev / (k - 1)), np.nan)
+        
+        # Calculate equity (CV = std / mean)
+        cv = np.where((mean > 0) & (n > 1), (std / mean).round(3), np.nan)
+    
+    return cv.reshape(n_years, len(SEASONS))
+
+
+def compute_equity_from_csv(source: CsvSource, crop_id: Optional[int] = None) -> Dict:
     """
     Compute equity (coefficient of variation) from CSV file
     Equity = SD(ETa) / Mean(ETa) for each season and year
     """
-    # Load CSV data
-    df = pd.read_csv(csv_path)
+    # Load CSV data (cached typed arrays, shared with the other indicators)
+    data = load_indicator_arrays(source)
     
     # Ensure required columns exist
-    required_cols = ['year', 'Season', 'status', 'ETa']
-    for col in required_cols:
-        if col not in df.columns:
-            raise ValueError(f"Missing required column: {col}")
+    require_columns(data.columns, REQUIRED_COLS)
     
     # Get unique years
-    years = sorted(df['year'].unique())
+    years = data.years
     
     # If crop_id is provided and CropID column exists, use it for filtering
-    has_crop_id = 'CropID' in df.columns
+    row_crop_id = crop_id_values(data)
+    has_crop_id = row_crop_id is not None
     if crop_id is None and has_crop_id:
-        # Use first available crop ID as default
-        crop_id = df['CropID'].dropna().unique()[0] if len(df['CropID'].dropna().unique()) > 0 else None
+        # Use first available crop ID as default (-1 when it is not numeric)
+        known_rows = np.flatnonzero(data.crop_id_column.cat.codes.to_numpy() >= 0)
+        crop_id = int(row_crop_id[known_rows[0]]) if known_rows.size > 0 else None
     
-    # Compute equity for each year and season
-    results = []
-    for year in years:
-        row = {'year': int(year)}
-        
-        for season in SEASONS:
-            # Filter data
-            if season == 0:
-                # Annual season - don't filter by CropID
-                subset = df[
-                    (df['year'] == year) &
-                    (df['status'].str.upper() == 'IRRIGATED') &
-                    (df['Season'] == season)
-                ]
-            else:
-                # Seasonal data - filter by CropID if available
-                if has_crop_id and crop_id is not None:
-                    subset = df[
-                        (df['CropID'] == crop_id) &
-                        (df['year'] == year) &
-                        (df['status'].str.upper() == 'IRRIGATED') &
-                        (df['Season'] == season)
-                    ]
-                else:
-                    subset = df[
-                        (df['year'] == year) &
-                        (df['status'].str.upper() == 'IRRIGATED') &
-                        (df['Season'] == season)
-                    ]
-            
-            # Calculate equity (CV = std / mean)
-            if not subset.empty and len(subset) > 1:
-                mean_eta = subset['ETa'].mean()
-                std_eta = subset['ETa'].std()
-                equity = round(std_eta / mean_eta, 3) if mean_eta > 0 else None
-            else:
-                equity = None
-            
-            # Map season to key
-            season_key = {0: 'annual', 1: 'kharif', 2: 'rabi', 3: 'zaid'}[season]
-            row[season_key] = equity
-        
-        results.append(row)
+    # Irrigated rows only; seasonal data is filtered by CropID if available,
+    # the annual season (0) never is
+    mask = data.irrigated
+    if has_crop_id and crop_id is not None:
+        if crop_id == -1:
+            # A non-numeric ID matches no row, only the annual season remains
+            mask = mask & (data.season == 0)
+        elif ne is not None:
+            mask = ne.evaluate('irrigated & ((crop_id == cid) | (season == 0))',
+                               local_dict={'irrigated': data.irrigated, 'crop_id': row_crop_id,
+                                           'season': data.season, 'cid': crop_id})
+        else:
+            mask = mask & ((row_crop_id == crop_id) | (data.season == 0))
+    
+    # Mean/SD of ETa for every (year, season) in one pass
+    cv = pd.DataFrame(eta_cv_table(data.year_code[mask], data.season[mask], data.eta[mask], len(years)),
+                      index=years, columns=[SEASON_KEYS[s] for s in SEASONS])
+    cv = cv.astype(object).where(cv.notna(), None)
+    
+    results = [{'year': int(year), **row} for year, row in cv.to_dict('index').items()]
     
     # Calculate averages
     def calc_avg(values):
@@ -0,0 +1,27 @@
+#============================================================
+#  GUNICORN CONFIGURATION
+#  Production entrypoint: gunicorn -c gunicorn_conf.py server:app
+#============================================================
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# One process per core so CSV parsing/aggregation runs in parallel across requests
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+worker_class = 'gthread'
+threads = 2
+timeout = 60
+
+# Import the app once in the master, which also compiles the adequacy, productivity
+# and cropping intensity numba kernels; workers inherit both copy-on-write
+preload_app = True
+
+
+def post_worker_init(worker):
+    """
+    Warm the default-file result cache in each worker before it serves requests
+    (preload_defaults logs failures rather than raising, so a bad file cannot stop the worker)
+    """
+    # Done after the fork: the pyarrow/polars thread pools are not fork-safe
+    import server as app_module
+    app_module.preload_defaults()
@@ -7,42 +7,41 @@ import pandas as pd
 import numpy as np
 from typing import Dict
 
-def compute_irrigation_utilization_from_csv(csv_path: str, cca: float) -> Dict:
+from _loader import CsvSource, load_indicator_arrays, require_columns
+
+# Columns required in the CSV
+REQUIRED_COLS = ['year', 'Area', 'status']
+
+
+def compute_irrigation_utilization_from_csv(source: CsvSource, cca: float) -> Dict:
     """
     Compute irrigation utilization from CSV file
     Irrigation Utilization = Irrigated Area / CCA
     """
-    # Load CSV data
-    df = pd.read_csv(csv_path)
+    # Load CSV data (cached typed arrays, shared with the other indicators)
+    data = load_indicator_arrays(source)
     
     # Ensure required columns exist
-    required_cols = ['year', 'Area', 'status']
-    for col in required_cols:
-        if col not in df.columns:
-            raise ValueError(f"Missing required column: {col}")
+    require_columns(data.columns, REQUIRED_COLS)
     
     # Get unique years
-    years = sorted(df['year'].unique())
+    years = data.years
+    
+    # Calculate total irrigated area for each year in one pass
+    weights = np.where(data.irrigated & ~np.isnan(data.area), data.area, 0)
+    irrigated_area = pd.Series(np.bincount(data.year_code, weights=weights, minlength=len(years)),
+                               index=years)
+    
+    # Calculate irrigation utilization
+    if cca > 0:
+        ratios = (irrigated_area / cca).round(4)
+    else:
+        ratios = pd.Series(0, index=irrigated_area.index)
     
-    # Calculate irrigation utilization for each year
-    results = []
-    for year in years:
-        year_data = df[df['year'] == year]
-        
-        # Filter irrigated areas
-        irrigated_data = year_data[year_data['status'].str.upper() == 'IRRIGATED']
-        
-        # Calculate total irrigated area
-        irrigated_area = irrigated_data['Area'].sum()
-        
-        # Calculate irrigation utilization
-        utilization = round(irrigated_area / cca, 4) if cca > 0 else 0
-        
-        results.append({
-            'year': int(year),
-            'irrigatedArea': round(irrigated_area, 2),
-            'utilizationRatio': utilization
-        })
+    results = [
+        {'year': int(year), 'irrigatedArea': round(area, 2), 'utilizationRatio': ratio}
+        for year, area, ratio in zip(irrigated_area.index, irrigated_area.tolist(), ratios.tolist())
+    ]
     
     return {
         'data': results,
@@ -7,6 +7,22 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
 
+from _loader import CsvSource, read_header, read_table, require_columns
+
+# polars is optional; without it the per-cell aggregates use pandas groupby
+# (it also needs pyarrow, for the pandas <-> polars conversions)
+try:
+    import polars as pl
+    import pyarrow  # noqa: F401
+except ImportError:
+    pl = None
+
+# numba is optional; it compiles the per-cell sums when polars is not installed
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 PRODUCTIVITY_SEASON_MAP = {
     0: 'annual',
     1: 'kharif',
@@ -15,154 +31,209 @@ PRODUCTIVITY_SEASON_MAP = {
     4: 'fullYear'
 }
 
+# Columns read from the productivity CSV, and their parse dtypes
+# (year/Season are narrowed after parsing, once blank cells are dropped)
+PRODUCTIVITY_COLS = ['year', 'Season', 'Crop Type', 'Area', 'ETa', 'TBP', 'status']
+PRODUCTIVITY_DTYPES = {'Crop Type': 'category', 'status': 'category',
+                       'Area': 'float32', 'ETa': 'float32', 'TBP': 'float32'}
+
+# Keys of the per-season table cells
+CELL_KEYS = ['year', 'Crop Type']
 
-def parse_productivity_csv(csv_path: str) -> pd.DataFrame:
+# Value columns aggregated per cell
+VALUE_COLS = ['Area', 'ETa', 'TBP', 'Productivity']
+
+
+def parse_productivity_csv(source: CsvSource) -> pd.DataFrame:
     """Parse productivity CSV file"""
-    df = pd.read_csv(csv_path)
-    
     # Ensure required columns exist
-    required_cols = ['year', 'Season', 'Crop Type', 'Area', 'ETa', 'TBP', 'status']
-    for col in required_cols:
-        if col not in df.columns:
-            raise ValueError(f"Missing required column: {col}")
+    require_columns(read_header(source), PRODUCTIVITY_COLS)
     
-    # Calculate productivity: TBP / (ETa * 10)
-    df['productivity'] = df.apply(
-        lambda row: row['TBP'] / (row['ETa'] * 10) if row['ETa'] > 0 else 0,
-        axis=1
-    )
+    # Only the used columns are parsed (multithreaded PyArrow parser or feather copy when
+    # installed, see _loader.read_table); low-cardinality columns come back as categoricals /
+    # narrow ints so filters and groupbys run on codes
+    df = read_table(source, PRODUCTIVITY_COLS, PRODUCTIVITY_DTYPES)
+    
+    # Rows with a blank year or season belong to no season table
+    missing = df['year'].isna() | df['Season'].isna()
+    if missing.any():
+        df = df[~missing].reset_index(drop=True)
+    df['Season'] = df['Season'].astype('int8')
+    df['year'] = df['year'].astype('int16')
+    
+    # Calculate productivity: TBP / (ETa * 10), 0 where ETa is not positive
+    eta = df['ETa'].to_numpy(dtype=np.float64)
+    tbp = df['TBP'].to_numpy(dtype=np.float64)
+    has_eta = eta > 0
+    df['Productivity'] = np.where(has_eta, tbp / np.where(has_eta, eta * 10, 1.0), 0.0)
     
     return df
 
 
-def generate_season_tables(df: pd.DataFrame, season_code: int) -> Optional[Dict]:
-    """Generate tables for a specific season"""
-    # Filter for season and irrigated status
-    base = df[(df['Season'] == season_code) & (df['status'] == 'IRRIGATED')].copy()
-    if base.empty:
+if njit is not None:
+    @njit(cache=True)
+    def _cell_sums(cell, area, eta, tbp, prod, n_cells):
+        # Columns: area, eta sum/count, tbp sum/count, prod sum/count, ap, pos_area
+        out = np.zeros((n_cells, 9), np.float64)
+        for i in range(cell.size):
+            c = cell[i]
+            if c < 0:
+                continue
+            if not np.isnan(area[i]):
+                out[c, 0] += area[i]
+            if area[i] > 0:
+                if not np.isnan(eta[i]):
+                    out[c, 1] += eta[i]
+                    out[c, 2] += 1
+                if not np.isnan(tbp[i]):
+                    out[c, 3] += tbp[i]
+                    out[c, 4] += 1
+                if not np.isnan(prod[i]):
+                    out[c, 5] += prod[i]
+                    out[c, 6] += 1
+                    out[c, 7] += area[i] * prod[i]
+                out[c, 8] += area[i]
+        return out
+
+
+def warm_up() -> None:
+    """Compile the numba cell kernel ahead of the first request (no-op without numba)"""
+    if njit is not None:
+        one = np.ones(1, np.float64)
+        _cell_sums(np.zeros(1, np.int64), one, one, one, one, 1)
+
+
+def table_rows(table: pd.DataFrame) -> List[List]:
+    """Row-major values of a table with Python-native values, NaN → None"""
+    return table.astype(object).where(table.notna(), None).to_numpy().tolist()
+
+
+def cell_aggregates(base: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """
+    Aggregates of irrigated rows per group of keys, in one pass
+    area sums every row; eta/tbp/prod means and the ap (Area * Productivity)
+    and pos_area sums only use rows with Area > 0
+    """
+    if pl is not None:
+        # One fused, multithreaded Polars plan for all six aggregations; the float32
+        # columns are widened first, as polars would otherwise sum them in float32
+        pos = pl.col('Area') > 0
+        cells = (pl.from_pandas(base[keys + VALUE_COLS]).lazy()
+                 .with_columns(pl.col(VALUE_COLS).cast(pl.Float64))
+                 .drop_nulls(keys)  # pandas groupby drops rows with a blank key
+                 .group_by(keys)
+                 .agg(area=pl.col('Area').sum(),
+                      eta=pl.col('ETa').filter(pos).mean(),
+                      tbp=pl.col('TBP').filter(pos).mean(),
+                      prod=pl.col('Productivity').filter(pos).mean(),
+                      ap=(pl.col('Area') * pl.col('Productivity')).filter(pos).sum(),
+                      pos_area=pl.col('Area').filter(pos).sum())
+                 .collect())
+        return cells.to_pandas().set_index(keys)
+    
+    if njit is not None:
+        # Group ids from pandas, then one compiled pass for every sum and count
+        groups = base.groupby(keys, observed=True)
+        cell = groups.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        index = groups.size().index
+        sums = _cell_sums(cell, *(base[c].to_numpy(dtype=np.float64) for c in VALUE_COLS), len(index))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({'area': sums[:, 0], 'eta': sums[:, 1] / sums[:, 2], 'tbp': sums[:, 3] / sums[:, 4],
+                                 'prod': sums[:, 5] / sums[:, 6], 'ap': sums[:, 7], 'pos_area': sums[:, 8]},
+                                index=index)
+    
+    # Sum the float32 columns in float64, as the polars and numba paths do
+    base = base.astype({c: np.float64 for c in VALUE_COLS})
+    filtered_avg = base[base['Area'] > 0]
+    area = base.groupby(keys, observed=True)['Area'].sum().to_frame('area')
+    means = (filtered_avg.groupby(keys, observed=True)
+             .agg(eta=('ETa', 'mean'), tbp=('TBP', 'mean'), prod=('Productivity', 'mean'),
+                  pos_area=('Area', 'sum')))
+    # Group the product series directly rather than assign() a copy of the frame
+    ap = filtered_avg['Area'] * filtered_avg['Productivity']
+    means['ap'] = ap.groupby([filtered_avg[k] for k in keys], observed=True).sum()
+    return area.join(means)
+
+
+def generate_season_tables(cells: Optional[pd.DataFrame]) -> Optional[Dict]:
+    """
+    Generate tables for a specific season
+    cells holds that season's irrigated (year, crop) aggregates (see cell_aggregates)
+    """
+    if cells is None or cells.empty:
         return None
     
-    filtered_avg = base[base['Area'] > 0].copy()
-    
-    years = sorted(base['year'].unique())
-    crops = sorted(base['Crop Type'].unique())
-    
-    # 1) AREA (SUM)
-    area = {}
-    for year in years:
-        area[year] = {}
-        for crop in crops:
-            total = base[(base['year'] == year) & (base['Crop Type'] == crop)]['Area'].sum()
-            area[year][crop] = round(total)
-        # Row average
-        row_values = [area[year][crop] for crop in crops]
-        area[year]['Average'] = round(sum(row_values) / len(row_values))
-    
-    # Column averages
-    area['Average'] = {}
-    for crop in crops + ['Average']:
-        col_values = [area[y][crop] for y in years if crop in area[y]]
-        area['Average'][crop] = round(sum(col_values) / len(col_values)) if col_values else 0
-    
-    # 2) ETa (AVERAGE)
-    eta = {}
-    for year in years:
-        eta[year] = {}
-        for crop in crops:
-            crop_records = filtered_avg[(filtered_avg['year'] == year) & (filtered_avg['Crop Type'] == crop)]
-            if len(crop_records) > 0 and area[year][crop] > 0:
-                eta[year][crop] = round(crop_records['ETa'].mean())
-            else:
-                eta[year][crop] = None
-        row_values = [v for v in eta[year].values() if v is not None]
-        eta[year]['Average'] = round(sum(row_values) / len(row_values)) if row_values else None
-    
-    eta['Average'] = {}
-    for crop in crops + ['Average']:
-        col_values = [eta[y][crop] for y in years if crop in eta[y] and eta[y][crop] is not None]
-        eta['Average'][crop] = round(sum(col_values) / len(col_values)) if col_values else None
-    
-    # 3) TBP (AVERAGE)
-    tbp = {}
-    for year in years:
-        tbp[year] = {}
-        for crop in crops:
-            crop_records = filtered_avg[(filtered_avg['year'] == year) & (filtered_avg['Crop Type'] == crop)]
-            if len(crop_records) > 0 and area[year][crop] > 0:
-                tbp[year][crop] = round(crop_records['TBP'].mean())
-            else:
-                tbp[year][crop] = None
-        row_values = [v for v in tbp[year].values() if v is not None]
-        tbp[year]['Average'] = round(sum(row_values) / len(row_values)) if row_values else None
-    
-    tbp['Average'] = {}
-    for crop in crops + ['Average']:
-        col_values = [tbp[y][crop] for y in years if crop in tbp[y] and tbp[y][crop] is not None]
-        tbp['Average'][crop] = round(sum(col_values) / len(col_values)) if col_values else None
+    years = sorted(cells.index.unique('year'))
+    crops = sorted(cells.index.unique('Crop Type'))
+    
+    # Spread the cell aggregates over the full years x crops grid
+    def by_cell(col):
+        return cells[col].unstack().reindex(index=years, columns=crops)
+    
+    # 1) AREA (SUM), with row and column averages
+    area = by_cell('area').fillna(0).round()
+    area['Average'] = area.mean(axis=1).round()
+    area.loc['Average'] = area.mean().round()
+    
+    # 2) ETa and 3) TBP (AVERAGE), blank where the cell has no area
+    has_area = area.loc[years, crops] > 0
+    
+    def mean_table(col):
+        table = by_cell(col).where(has_area).round()
+        table['Average'] = table.mean(axis=1).round()
+        table.loc['Average'] = table.mean().round()
+        return table
+    
+    eta = mean_table('eta')
+    tbp = mean_table('tbp')
     
     # 4) PRODUCTIVITY (mean + weighted average)
-    productivity = {}
-    weighted_productivity = {}
-    
-    for year in years:
-        productivity[year] = {}
-        for crop in crops:
-            crop_records = filtered_avg[(filtered_avg['year'] == year) & (filtered_avg['Crop Type'] == crop)]
-            if len(crop_records) > 0:
-                avg = crop_records['productivity'].mean()
-                productivity[year][crop] = round(avg, 2)
-            else:
-                productivity[year][crop] = None
-        
-        # Weighted average for year
-        year_records = filtered_avg[filtered_avg['year'] == year]
-        total_area = year_records['Area'].sum()
-        if total_area > 0:
-            weighted_sum = (year_records['Area'] * year_records['productivity']).sum()
-            weighted_productivity[year] = round(weighted_sum / total_area, 2)
-            productivity[year]['Average'] = weighted_productivity[year]
-        else:
-            weighted_productivity[year] = None
-            productivity[year]['Average'] = None
-    
-    # Average row
-    productivity['Average'] = {}
-    for crop in crops:
-        col_values = [productivity[y][crop] for y in years if crop in productivity[y] and productivity[y][crop] is not None]
-        productivity['Average'][crop] = round(sum(col_values) / len(col_values), 2) if col_values else None
-    
-    weighted_values = [v for v in weighted_productivity.values() if v is not None]
-    average_weighted_productivity = round(sum(weighted_values) / len(weighted_values), 2) if weighted_values else None
-    productivity['Average']['Average'] = average_weighted_productivity
-    
-    # Convert year keys to strings for JSON serialization
-    area_str = {str(k): v for k, v in area.items()}
-    eta_str = {str(k): v for k, v in eta.items()}
-    tbp_str = {str(k): v for k, v in tbp.items()}
-    productivity_str = {str(k): v for k, v in productivity.items()}
-    weighted_productivity_str = {str(k): v for k, v in weighted_productivity.items()}
+    productivity = by_cell('prod').round(2)
+    
+    # Weighted average per year: SUM(Area * Productivity) / SUM(Area)
+    weights = cells.groupby(level='year')[['ap', 'pos_area']].sum().reindex(years)
+    weighted_productivity = (weights['ap'] / weights['pos_area']).where(weights['pos_area'] > 0).round(2)
     
+    # Average row (the weighted column averages to the overall weighted productivity)
+    productivity['Average'] = weighted_productivity
+    productivity.loc['Average'] = productivity.mean().round(2)
+    average_weighted_productivity = productivity.loc['Average', 'Average']
+    average_weighted_productivity = None if pd.isna(average_weighted_productivity) else float(average_weighted_productivity)
+    
+    # Year keys stay ints; the server's JSON encoder writes them as strings
+    weighted_by_year = {int(k): (None if pd.isna(v) else float(v)) for k, v in weighted_productivity.items()}
+    
+    # Tables share one index/columns pair and are sent as row-major values (split layout);
+    # whole-unit tables go through nullable ints so cells come out as Python ints
     return {
-        'area': area_str,
-        'eta': eta_str,
-        'tbp': tbp_str,
-        'productivity': productivity_str,
-        'weighted_productivity': weighted_productivity_str,
-        'years': years,
+        'index': [int(y) for y in years] + ['Average'],
+        'columns': crops + ['Average'],
+        'area_values': table_rows(area.astype('Int64')),
+        'eta_values': table_rows(eta.astype('Int64')),
+        'tbp_values': table_rows(tbp.astype('Int64')),
+        'productivity_values': table_rows(productivity),
+        'weighted_productivity': weighted_by_year,
+        'years': [int(y) for y in years],
         'crops': crops,
         'average_weighted_productivity': average_weighted_productivity,
     }
 
 
-def compute_productivity_from_csv(csv_path: str) -> Dict:
+def compute_productivity_from_csv(source: CsvSource) -> Dict:
     """Compute productivity from CSV file"""
-    df = parse_productivity_csv(csv_path)
+    df = parse_productivity_csv(source)
+    
+    # Filter irrigated rows once, keeping only the columns the cells need,
+    # then aggregate every season in one grouped pass and hand each season its slice
+    irrigated = df.loc[df['status'] == 'IRRIGATED', ['Season'] + CELL_KEYS + VALUE_COLS]
+    cells = cell_aggregates(irrigated, ['Season'] + CELL_KEYS)
+    season_cells = {s: sub.droplevel('Season') for s, sub in cells.groupby(level='Season')}
     
     # Generate tables for each season
-    kharif = generate_season_tables(df, 1)
-    rabi = generate_season_tables(df, 2)
-    zaid = generate_season_tables(df, 3)
-    annual = generate_season_tables(df, 4)  # Season 4 = full year/annual
+    kharif = generate_season_tables(season_cells.get(1))
+    rabi = generate_season_tables(season_cells.get(2))
+    zaid = generate_season_tables(season_cells.get(3))
+    annual = generate_season_tables(season_cells.get(4))  # Season 4 = full year/annual
     
     # Build summary
     all_years = set()
@@ -176,10 +247,10 @@ def compute_productivity_from_csv(csv_path: str) -> Dict:
     for year in sorted_years:
         summary.append({
             'year': int(year),
-            'kharif': kharif['weighted_productivity'].get(str(year)) if kharif else None,
-            'rabi': rabi['weighted_productivity'].get(str(year)) if rabi else None,
-            'zaid': zaid['weighted_productivity'].get(str(year)) if zaid else None,
-            'annual': annual['weighted_productivity'].get(str(year)) if annual else None,
+            'kharif': kharif['weighted_productivity'].get(int(year)) if kharif else None,
+            'rabi': rabi['weighted_productivity'].get(int(year)) if rabi else None,
+            'zaid': zaid['weighted_productivity'].get(int(year)) if zaid else None,
+            'annual': annual['weighted_productivity'].get(int(year)) if annual else None,
         })
     
     average = {
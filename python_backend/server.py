@@ -3,46 +3,90 @@ Flask server for IPA Stats calculations
 Provides API endpoints for adequacy and productivity calculations
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import os
-import tempfile
-from werkzeug.utils import secure_filename
+import io
+import logging
+from functools import lru_cache
 import json
+import orjson
 
-from adequacy_calculation import compute_adequacy_from_csv
-from productivity_calculation import compute_productivity_from_csv
+from adequacy_calculation import compute_adequacy_from_csv, warm_up as warm_up_adequacy
+from productivity_calculation import compute_productivity_from_csv, warm_up as warm_up_productivity
 from equity import compute_equity_from_csv
-from cropping_intensity import compute_cropping_intensity_from_csv
+from cropping_intensity import compute_cropping_intensity_from_csv, warm_up as warm_up_cropping_intensity
 from irrigation_utilization import compute_irrigation_utilization_from_csv
+from _loader import write_feather_cache
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Configure upload folder
-UPLOAD_FOLDER = tempfile.gettempdir()
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Per-request debug logs are off at the default INFO level (set LOGLEVEL=DEBUG to see them)
+logging.basicConfig(level=os.environ.get('LOGLEVEL', 'INFO').upper())
+log = logging.getLogger('ipa')
+
+# Compile (or load from numba's on-disk cache) the optional numba kernels before the
+# first request; under gunicorn this runs once in the master (see gunicorn_conf.py)
+warm_up_adequacy()
+warm_up_productivity()
+warm_up_cropping_intensity()
+
+# Uploads are parsed in memory; cap their size
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
 ALLOWED_EXTENSIONS = {'csv'}
 
+# Bundled data files used when a request has no upload
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'public', 'data')
+DEFAULT_INDICATOR_CSV = os.path.join(DATA_DIR, 'Data_perSeason_perCrop.csv')
+DEFAULT_PRODUCTIVITY_CSV = os.path.join(DATA_DIR, 'stats_IndiaSchemes_perCrop_Ong.csv')
+
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def convert_to_serializable(obj):
-    """Convert numpy/pandas types to JSON serializable types"""
-    if isinstance(obj, dict):
-        return {k: convert_to_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_serializable(item) for item in obj]
-    elif hasattr(obj, 'item'):  # numpy types
-        return obj.item()
-    elif obj is None or isinstance(obj, (str, int, float, bool)):
-        return obj
-    else:
-        return str(obj)
+def _to_json(obj):
+    """Serialize a result to JSON bytes, encoding numpy arrays/scalars natively (NaN → null)"""
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=16)
+def _cached_result_json(compute, path, mtime_ns, size, *args):
+    """Serialized compute(path, *args), cached until the file's mtime/size changes"""
+    return _to_json(compute(path, *args))
+
+
+def default_result_response(compute, path, *args):
+    """JSON response for a computation on a default data file (memoized per file version)"""
+    st = os.stat(path)
+    body = _cached_result_json(compute, path, st.st_mtime_ns, st.st_size, *args)
+    return Response(body, mimetype='application/json')
+
+
+def preload_defaults():
+    """
+    Write feather copies of the default files and fill their result cache
+    (CCA-dependent indicators are computed on demand)
+    """
+    # Both steps are optimizations only: a failure is logged and the file is then
+    # parsed from CSV (or fails) per request, rather than stopping the server
+    for path in (DEFAULT_INDICATOR_CSV, DEFAULT_PRODUCTIVITY_CSV):
+        if os.path.exists(path):
+            try:
+                write_feather_cache(path)
+            except (OSError, ValueError) as e:
+                log.warning("Could not write feather copy of %s: %s", path, e)
+    
+    for compute, path, args in [(compute_adequacy_from_csv, DEFAULT_INDICATOR_CSV, ()),
+                                (compute_equity_from_csv, DEFAULT_INDICATOR_CSV, (None,)),
+                                (compute_productivity_from_csv, DEFAULT_PRODUCTIVITY_CSV, ())]:
+        if os.path.exists(path):
+            try:
+                default_result_response(compute, path, *args)
+            except Exception as e:
+                log.warning("Could not preload %s on %s: %s", compute.__name__, path, e)
 
 
 @app.route('/api/health', methods=['GET'])
@@ -58,10 +102,9 @@ def calculate_adequacy():
         # Check if file is present
         if 'file' not in request.files:
             # Try to use default file
-            default_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'data', 'Data_perSeason_perCrop.csv')
+            default_path = DEFAULT_INDICATOR_CSV
             if os.path.exists(default_path):
-                result = compute_adequacy_from_csv(default_path)
-                return jsonify(convert_to_serializable(result))
+                return default_result_response(compute_adequacy_from_csv, default_path)
             else:
                 return jsonify({'error': 'No file provided and default file not found'}), 400
         
@@ -73,19 +116,14 @@ def calculate_adequacy():
         if not allowed_file(file.filename):
             return jsonify({'error': 'File type not allowed. Only CSV files are accepted'}), 400
         
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # Read the upload into memory (no temporary file)
+        source = io.BytesIO(file.read())
         
         # Compute adequacy
-        result = compute_adequacy_from_csv(filepath)
+        result = compute_adequacy_from_csv(source)
         
-        # Clean up temporary file
-        os.remove(filepath)
-        
-        # Convert result to JSON serializable format
-        return jsonify(convert_to_serializable(result))
+        # Serialize result (numpy values encoded natively)
+        return Response(_to_json(result), mimetype='application/json')
     
     except Exception as e:
         import traceback
@@ -99,23 +137,23 @@ def calculate_adequacy():
 def calculate_productivity():
     """Calculate productivity from uploaded CSV file"""
     try:
-        print("[PRODUCTIVITY] Request received")  # Debug log
+        log.debug("[PRODUCTIVITY] Request received")
         
         # Check if file is present
         if 'file' not in request.files:
             # Try to use default file
-            default_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'data', 'stats_IndiaSchemes_perCrop_Ong.csv')
-            print(f"[PRODUCTIVITY] No file uploaded, using default: {default_path}")  # Debug log
+            default_path = DEFAULT_PRODUCTIVITY_CSV
+            log.debug("[PRODUCTIVITY] No file uploaded, using default: %s", default_path)
             if os.path.exists(default_path):
-                result = compute_productivity_from_csv(default_path)
-                print(f"[PRODUCTIVITY] Calculation successful")
-                return jsonify(convert_to_serializable(result))
+                response = default_result_response(compute_productivity_from_csv, default_path)
+                log.debug("[PRODUCTIVITY] Calculation successful")
+                return response
             else:
-                print(f"[PRODUCTIVITY] Default file not found at {default_path}")  # Debug log
+                log.debug("[PRODUCTIVITY] Default file not found at %s", default_path)
                 return jsonify({'error': 'No file provided and default file not found'}), 400
         
         file = request.files['file']
-        print(f"[PRODUCTIVITY] File received: {file.filename}")  # Debug log
+        log.debug("[PRODUCTIVITY] File received: %s", file.filename)
         
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
@@ -123,29 +161,23 @@ def calculate_productivity():
         if not allowed_file(file.filename):
             return jsonify({'error': 'File type not allowed. Only CSV files are accepted'}), 400
         
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        print(f"[PRODUCTIVITY] File saved to: {filepath}")  # Debug log
+        # Read the upload into memory (no temporary file)
+        source = io.BytesIO(file.read())
+        log.debug("[PRODUCTIVITY] File read into memory (%s bytes)", source.getbuffer().nbytes)
         
         # Compute productivity
-        print(f"[PRODUCTIVITY] Starting calculation...")  # Debug log
-        result = compute_productivity_from_csv(filepath)
-        print(f"[PRODUCTIVITY] Calculation complete")  # Debug log
-        
-        # Clean up temporary file
-        os.remove(filepath)
+        log.debug("[PRODUCTIVITY] Starting calculation...")
+        result = compute_productivity_from_csv(source)
+        log.debug("[PRODUCTIVITY] Calculation complete")
         
-        # Convert result to JSON serializable format
-        serializable_result = convert_to_serializable(result)
-        print(f"[PRODUCTIVITY] Returning result with {len(result.get('summary', []))} summary rows")  # Debug log
-        return jsonify(serializable_result)
+        # Serialize result (numpy values encoded natively)
+        log.debug("[PRODUCTIVITY] Returning result with %s summary rows", len(result.get('summary', [])))
+        return Response(_to_json(result), mimetype='application/json')
     
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
-        print(f"[PRODUCTIVITY ERROR] {error_trace}")  # Debug log
+        log.error("[PRODUCTIVITY ERROR] %s", error_trace)
         return jsonify({
             'error': str(e),
             'traceback': error_trace
@@ -156,7 +188,7 @@ def calculate_productivity():
 def calculate_equity():
     """Calculate equity from uploaded CSV file"""
     try:
-        print("[EQUITY] Request received")  # Debug log
+        log.debug("[EQUITY] Request received")
         
         # Get crop_id from request if provided
         crop_id = request.form.get('crop_id', type=int)
@@ -164,18 +196,18 @@ def calculate_equity():
         # Check if file is present
         if 'file' not in request.files:
             # Try to use default file
-            default_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'data', 'Data_perSeason_perCrop.csv')
-            print(f"[EQUITY] No file uploaded, using default: {default_path}")  # Debug log
+            default_path = DEFAULT_INDICATOR_CSV
+            log.debug("[EQUITY] No file uploaded, using default: %s", default_path)
             if os.path.exists(default_path):
-                result = compute_equity_from_csv(default_path, crop_id)
-                print(f"[EQUITY] Calculation successful")
-                return jsonify(convert_to_serializable(result))
+                response = default_result_response(compute_equity_from_csv, default_path, crop_id)
+                log.debug("[EQUITY] Calculation successful")
+                return response
             else:
-                print(f"[EQUITY] Default file not found at {default_path}")  # Debug log
+                log.debug("[EQUITY] Default file not found at %s", default_path)
                 return jsonify({'error': 'No file provided and default file not found'}), 400
         
         file = request.files['file']
-        print(f"[EQUITY] File received: {file.filename}")  # Debug log
+        log.debug("[EQUITY] File received: %s", file.filename)
         
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
@@ -183,29 +215,23 @@ def calculate_equity():
         if not allowed_file(file.filename):
             return jsonify({'error': 'File type not allowed. Only CSV files are accepted'}), 400
         
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        print(f"[EQUITY] File saved to: {filepath}")  # Debug log
+        # Read the upload into memory (no temporary file)
+        source = io.BytesIO(file.read())
+        log.debug("[EQUITY] File read into memory (%s bytes)", source.getbuffer().nbytes)
         
         # Compute equity
-        print(f"[EQUITY] Starting calculation...")  # Debug log
-        result = compute_equity_from_csv(filepath, crop_id)
-        print(f"[EQUITY] Calculation complete")  # Debug log
+        log.debug("[EQUITY] Starting calculation...")
+        result = compute_equity_from_csv(source, crop_id)
+        log.debug("[EQUITY] Calculation complete")
         
-        # Clean up temporary file
-        os.remove(filepath)
-        
-        # Convert result to JSON serializable format
-        serializable_result = convert_to_serializable(result)
-        print(f"[EQUITY] Returning result with {len(result.get('summary', []))} summary rows")  # Debug log
-        return jsonify(serializable_result)
+        # Serialize result (numpy values encoded natively)
+        log.debug("[EQUITY] Returning result with %s summary rows", len(result.get('summary', [])))
+        return Response(_to_json(result), mimetype='application/json')
     
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
-        print(f"[EQUITY ERROR] {error_trace}")  # Debug log
+        log.error("[EQUITY ERROR] %s", error_trace)
         return jsonify({
             'error': str(e),
             'traceback': error_trace
@@ -216,7 +242,7 @@ def calculate_equity():
 def calculate_cropping_intensity():
     """Calculate cropping intensity from uploaded CSV file"""
     try:
-        print("[CROPPING_INTENSITY] Request received")  # Debug log
+        log.debug("[CROPPING_INTENSITY] Request received")
         
         # Get CCA from request
         cca = request.form.get('cca', type=float)
@@ -226,18 +252,18 @@ def calculate_cropping_intensity():
         # Check if file is present
         if 'file' not in request.files:
             # Try to use default file
-            default_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'data', 'Data_perSeason_perCrop.csv')
-            print(f"[CROPPING_INTENSITY] No file uploaded, using default: {default_path}")  # Debug log
+            default_path = DEFAULT_INDICATOR_CSV
+            log.debug("[CROPPING_INTENSITY] No file uploaded, using default: %s", default_path)
             if os.path.exists(default_path):
-                result = compute_cropping_intensity_from_csv(default_path, cca)
-                print(f"[CROPPING_INTENSITY] Calculation successful")
-                return jsonify(convert_to_serializable(result))
+                response = default_result_response(compute_cropping_intensity_from_csv, default_path, cca)
+                log.debug("[CROPPING_INTENSITY] Calculation successful")
+                return response
             else:
-                print(f"[CROPPING_INTENSITY] Default file not found at {default_path}")  # Debug log
+                log.debug("[CROPPING_INTENSITY] Default file not found at %s", default_path)
                 return jsonify({'error': 'No file provided and default file not found'}), 400
         
         file = request.files['file']
-        print(f"[CROPPING_INTENSITY] File received: {file.filename}")  # Debug log
+        log.debug("[CROPPING_INTENSITY] File received: %s", file.filename)
         
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
@@ -245,27 +271,22 @@ def calculate_cropping_intensity():
         if not allowed_file(file.filename):
             return jsonify({'error': 'File type not allowed. Only CSV files are accepted'}), 400
         
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        print(f"[CROPPING_INTENSITY] File saved to: {filepath}")  # Debug log
+        # Read the upload into memory (no temporary file)
+        source = io.BytesIO(file.read())
+        log.debug("[CROPPING_INTENSITY] File read into memory (%s bytes)", source.getbuffer().nbytes)
         
         # Compute cropping intensity
-        print(f"[CROPPING_INTENSITY] Starting calculation with CCA={cca}...")  # Debug log
-        result = compute_cropping_intensity_from_csv(filepath, cca)
-        print(f"[CROPPING_INTENSITY] Calculation complete")  # Debug log
-        
-        # Clean up temporary file
-        os.remove(filepath)
+        log.debug("[CROPPING_INTENSITY] Starting calculation with CCA=%s...", cca)
+        result = compute_cropping_intensity_from_csv(source, cca)
+        log.debug("[CROPPING_INTENSITY] Calculation complete")
         
-        # Convert result to JSON serializable format
-        return jsonify(convert_to_serializable(result))
+        # Serialize result (numpy values encoded natively)
+        return Response(_to_json(result), mimetype='application/json')
     
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
-        print(f"[CROPPING_INTENSITY ERROR] {error_trace}")  # Debug log
+        log.error("[CROPPING_INTENSITY ERROR] %s", error_trace)
         return jsonify({
             'error': str(e),
             'traceback': error_trace
@@ -276,7 +297,7 @@ def calculate_cropping_intensity():
 def calculate_irrigation_utilization():
     """Calculate irrigation utilization from uploaded CSV file"""
     try:
-        print("[IRRIGATION_UTILIZATION] Request received")  # Debug log
+        log.debug("[IRRIGATION_UTILIZATION] Request received")
         
         # Get CCA from request
         cca = request.form.get('cca', type=float)
@@ -286,18 +307,18 @@ def calculate_irrigation_utilization():
         # Check if file is present
         if 'file' not in request.files:
             # Try to use default file
-            default_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'data', 'Data_perSeason_perCrop.csv')
-            print(f"[IRRIGATION_UTILIZATION] No file uploaded, using default: {default_path}")  # Debug log
+            default_path = DEFAULT_INDICATOR_CSV
+            log.debug("[IRRIGATION_UTILIZATION] No file uploaded, using default: %s", default_path)
             if os.path.exists(default_path):
-                result = compute_irrigation_utilization_from_csv(default_path, cca)
-                print(f"[IRRIGATION_UTILIZATION] Calculation successful")
-                return jsonify(convert_to_serializable(result))
+                response = default_result_response(compute_irrigation_utilization_from_csv, default_path, cca)
+                log.debug("[IRRIGATION_UTILIZATION] Calculation successful")
+                return response
             else:
-                print(f"[IRRIGATION_UTILIZATION] Default file not found at {default_path}")  # Debug log
+                log.debug("[IRRIGATION_UTILIZATION] Default file not found at %s", default_path)
                 return jsonify({'error': 'No file provided and default file not found'}), 400
         
         file = request.files['file']
-        print(f"[IRRIGATION_UTILIZATION] File received: {file.filename}")  # Debug log
+        log.debug("[IRRIGATION_UTILIZATION] File received: %s", file.filename)
         
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
@@ -305,27 +326,22 @@ def calculate_irrigation_utilization():
         if not allowed_file(file.filename):
             return jsonify({'error': 'File type not allowed. Only CSV files are accepted'}), 400
         
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        print(f"[IRRIGATION_UTILIZATION] File saved to: {filepath}")  # Debug log
+        # Read the upload into memory (no temporary file)
+        source = io.BytesIO(file.read())
+        log.debug("[IRRIGATION_UTILIZATION] File read into memory (%s bytes)", source.getbuffer().nbytes)
         
         # Compute irrigation utilization
-        print(f"[IRRIGATION_UTILIZATION] Starting calculation with CCA={cca}...")  # Debug log
-        result = compute_irrigation_utilization_from_csv(filepath, cca)
-        print(f"[IRRIGATION_UTILIZATION] Calculation complete")  # Debug log
+        log.debug("[IRRIGATION_UTILIZATION] Starting calculation with CCA=%s...", cca)
+        result = compute_irrigation_utilization_from_csv(source, cca)
+        log.debug("[IRRIGATION_UTILIZATION] Calculation complete")
         
-        # Clean up temporary file
-        os.remove(filepath)
-        
-        # Convert result to JSON serializable format
-        return jsonify(convert_to_serializable(result))
+        # Serialize result (numpy values encoded natively)
+        return Response(_to_json(result), mimetype='application/json')
     
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
-        print(f"[IRRIGATION_UTILIZATION ERROR] {error_trace}")  # Debug log
+        log.error("[IRRIGATION_UTILIZATION ERROR] %s", error_trace)
         return jsonify({
             'error': str(e),
             'traceback': error_trace
@@ -342,4 +358,7 @@ if __name__ == '__main__':
     print(f"  - POST http://localhost:{port}/api/equity")
     print(f"  - POST http://localhost:{port}/api/cropping-intensity")
     print(f"  - POST http://localhost:{port}/api/irrigation-utilization")
-    app.run(debug=True, port=port, host='0.0.0.0')
+    preload_defaults()
+    
+    # Development server only; production runs under gunicorn (see gunicorn_conf.py)
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', port=port, host='0.0.0.0')
@@ -11,7 +11,8 @@ import {
   AdequacySummary, 
   SeasonResults, 
   SEASON_OPTIONS,
-  SEASON_LABELS
+  SEASON_LABELS,
+  matrixFromSplit
 } from '@/lib/adequacyCalculation';
 import { toast } from 'sonner';
 
@@ -66,8 +67,8 @@ export function AdequacyDetail() {
         if (result.season_results) {
           Object.entries(result.season_results).forEach(([season, data]: [string, any]) => {
             seasonResultsMap.set(Number(season), {
-              areaMatrix: data.area_matrix,
-              adequacyMatrix: data.adequacy_matrix,
+              areaMatrix: matrixFromSplit(data.index, data.columns, data.area_values),
+              adequacyMatrix: matrixFromSplit(data.index, data.columns, data.adeq_values),
               combinedAdequacy: data.combined_adequacy,
               cropTypes: data.crop_types,
             });
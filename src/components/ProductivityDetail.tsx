@@ -5,7 +5,7 @@ import { Button } from '@/components/ui/button';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from '@/components/ui/table';
 import { useProject } from '@/context/ProjectContext';
-import { ProductivityData, PRODUCTIVITY_SEASON_OPTIONS, SeasonTables } from '@/lib/productivityCalculation';
+import { ProductivityData, PRODUCTIVITY_SEASON_OPTIONS, SeasonTables, productivityFromPayload } from '@/lib/productivityCalculation';
 import { exportToCSV, formatDateForFilename } from '@/lib/exportUtils';
 import { toast } from 'sonner';
 
@@ -53,7 +53,7 @@ export function ProductivityDetail() {
         }
         
         const data = await apiResponse.json();
-        setProductivityData(data);
+        setProductivityData(productivityFromPayload(data));
         toast.success('Productivity calculated successfully using Python backend');
       } catch (err) {
         console.error('Error loading productivity data:', err);
@@ -118,7 +118,7 @@ export function ProductivityDetail() {
       const row: Record<string, any> = { Year: year };
       crops.forEach(crop => {
         const val = tableData[year]?.[crop];
-        row[crop] = val !== undefined && !isNaN(val) ? val : 'N/A';
+        row[crop] = val != null && !isNaN(val) ? val : 'N/A';
       });
       return row;
     });
@@ -152,7 +152,7 @@ export function ProductivityDetail() {
                 <TableCell className="font-medium">{year}</TableCell>
                 {crops.map(crop => {
                   const val = tableData[year]?.[crop];
-                  const display = val !== undefined && !isNaN(val) ? val : '-';
+                  const display = val != null && !isNaN(val) ? val : '-';
                   return (
                     <TableCell key={crop} className="text-center">
                       {display}
@@ -51,6 +51,26 @@ export interface SeasonResults {
   cropTypes: string[];
 }
 
+/**
+ * Rebuild a year → crop matrix from the Python backend's split payload
+ * (shared index/columns lists plus one row of values per year)
+ */
+export function matrixFromSplit<T, K extends number | string = number>(
+  index: K[],
+  columns: string[],
+  values: T[][]
+): Record<K, { [crop: string]: T }> {
+  const matrix = {} as Record<K, { [crop: string]: T }>;
+  index.forEach((year, i) => {
+    const row: { [crop: string]: T } = {};
+    columns.forEach((crop, j) => {
+      row[crop] = values[i][j];
+    });
+    matrix[year] = row;
+  });
+  return matrix;
+}
+
 export interface AdequacySummary {
   year: number;
   kharif: number | null;
@@ -1,6 +1,8 @@
 // Productivity calculation based on Python script logic
 // Computes Area, ETa, TBP and Productivity tables for each season
 
+import { matrixFromSplit } from './adequacyCalculation';
+
 export interface CropRecord {
   year: number;
   season: number; // 0=Annual, 1=Kharif, 2=Rabi, 3=Zaid, 4=Full year
@@ -12,15 +14,16 @@ export interface CropRecord {
   productivity?: number;
 }
 
+// Cells without data are NaN when computed locally and null from the Python backend
 export interface SeasonTables {
-  area: Record<string, Record<string, number>>; // year -> cropType -> value
-  eta: Record<string, Record<string, number>>;
-  tbp: Record<string, Record<string, number>>;
-  productivity: Record<string, Record<string, number>>;
-  weightedProductivity: Record<string, number>; // year -> weighted avg
+  area: Record<string, Record<string, number | null>>; // year -> cropType -> value
+  eta: Record<string, Record<string, number | null>>;
+  tbp: Record<string, Record<string, number | null>>;
+  productivity: Record<string, Record<string, number | null>>;
+  weightedProductivity: Record<string, number | null>; // year -> weighted avg
   years: number[];
   crops: string[];
-  averageWeightedProductivity: number;
+  averageWeightedProductivity: number | null;
 }
 
 export interface ProductivityData {
@@ -45,6 +48,39 @@ export interface ProductivityData {
   };
 }
 
+/**
+ * Map the Python backend's /api/productivity response onto ProductivityData
+ */
+export function productivityFromPayload(payload: any): ProductivityData {
+  const seasonTables = (data: any): SeasonTables | null => {
+    if (!data) return null;
+    // The index ends with the 'Average' row; blank cells arrive as null
+    const table = (values: (number | null)[][]) =>
+      matrixFromSplit<number | null, number | string>(data.index, data.columns, values);
+    return {
+      area: table(data.area_values),
+      eta: table(data.eta_values),
+      tbp: table(data.tbp_values),
+      productivity: table(data.productivity_values),
+      weightedProductivity: data.weighted_productivity,
+      years: data.years,
+      crops: data.crops,
+      averageWeightedProductivity: data.average_weighted_productivity,
+    };
+  };
+
+  return {
+    summary: payload.summary,
+    average: payload.average,
+    seasonTables: {
+      kharif: seasonTables(payload.season_tables?.kharif),
+      rabi: seasonTables(payload.season_tables?.rabi),
+      zaid: seasonTables(payload.season_tables?.zaid),
+      annual: seasonTables(payload.season_tables?.annual),
+    },
+  };
+}
+
 export const PRODUCTIVITY_SEASON_MAP: Record<number, string> = {
   0: 'annual',
   1: 'kharif',